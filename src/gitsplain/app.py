@@ -1,9 +1,12 @@
+from collections.abc import Callable
+from typing import Any
+
 import streamlit as st
 import streamlit.components.v1 as components
 from dotenv import load_dotenv
 from github import GithubException
 
-from gitsplain.diagram import get_diagram_generator
+from gitsplain.diagram import GenerationState, get_diagram_generator
 from gitsplain.services.github import GitHubClient
 from gitsplain.utils import parse_github_url
 
@@ -28,12 +31,138 @@ def init_session_state():
         "explanation": None,
         "component_mapping": None,
         "graph_structure": None,
+        "joined": {},
+        "last_request_key": None,
     }
     for key, value in defaults.items():
         if key not in st.session_state:
             st.session_state[key] = value
 
 
+def join_state_strings(state: GenerationState) -> dict[str, str]:
+    """Join the list fields shown in the tabs once per generation."""
+    mappings = state.component_mapping.get("mappings", [])
+    nodes = state.graph_structure.get("nodes", [])
+    edges = state.graph_structure.get("edges", [])
+    return {
+        "file_tree": "\n".join(state.repo_info.get("file_tree", [])),
+        "symbols": "\n".join(str(s) for s in state.static_analysis.get("symbols", [])),
+        "mappings": "\n".join(str(m) for m in mappings),
+        "nodes": "\n".join(str(n) for n in nodes),
+        "edges": "\n".join(str(e) for e in edges),
+    }
+
+
+# Status label shown once each generation step completes
+PHASE_LABELS = {
+    "repo_info": "Parsing source files...",
+    "static_analysis": "Explaining the architecture...",
+    "explanation": "Mapping components to files...",
+    "component_mapping": "Building the graph...",
+    "graph_structure": "Rendering the diagram...",
+    "graph_html": "Diagram generated",
+}
+
+
+# Each entry holds a full GenerationState (symbols, LLM output, HTML), so keep
+# only the most recent generations
+@st.cache_data(show_spinner=False, ttl=3600, max_entries=16)
+def generate_diagram(
+    owner: str,
+    repo: str,
+    head_sha: str | None,
+    instructions: str,
+    _on_phase: Callable[[str, GenerationState], None] | None = None,
+    _on_partial: Callable[[str, dict[str, Any]], None] | None = None,
+) -> GenerationState:
+    """Run the generation pipeline, cached per commit across reruns.
+
+    `head_sha` pins the commit that is read and is part of the cache key, so a
+    new commit on the default branch invalidates the cached result for that
+    repository. `_on_phase` and `_on_partial` report progress and are not
+    hashed, so they only fire on a cache miss.
+    """
+    generator = get_diagram_generator()
+    state = generator.state
+    # Read the commit the cache key names, even if the branch moves meanwhile
+    steps = generator.run_all_iter(
+        owner, repo, instructions, on_partial=_on_partial, ref=head_sha
+    )
+    for phase, state in steps:
+        if _on_phase:
+            _on_phase(phase, state)
+    return state
+
+
+def render_graph_tab():
+    """Render the Mermaid diagram."""
+    if st.session_state.graph_html:
+        components.html(st.session_state.graph_html, height=600, scrolling=True)
+    else:
+        st.info("Enter a repository and click 'Generate Diagram' to visualize.")
+
+
+def render_repo_analysis_tab():
+    """Render the repository data sent to the analysis prompt."""
+    if st.session_state.repo_info:
+        joined = st.session_state.joined
+        readme = st.session_state.repo_info.get("readme", "")
+        llm_input = (
+            f"<filetree>\n{joined.get('file_tree', '')}\n</filetree>\n\n"
+            f"<symbols>\n{joined.get('symbols', '')}\n</symbols>\n\n"
+            f"<readme>\n{readme}\n</readme>"
+        )
+        st.code(llm_input, language=None)
+    else:
+        st.caption("No repository data yet.")
+
+
+def render_explanation_tab():
+    """Render the architecture explanation."""
+    if st.session_state.explanation:
+        st.subheader("LLM Output")
+        st.code(st.session_state.explanation, language=None)
+    else:
+        st.caption("No explanation generated yet.")
+
+
+def render_mapping_tab():
+    """Render the component mapping prompt input and output."""
+    if st.session_state.explanation:
+        joined = st.session_state.joined
+        llm_input = (
+            f"<explanation>\n{st.session_state.explanation}\n</explanation>\n\n"
+            f"<file_tree>\n{joined.get('file_tree', '')}\n</file_tree>\n\n"
+            f"<symbols>\n{joined.get('symbols', '')}\n</symbols>"
+        )
+        st.code(llm_input, language=None)
+        if st.session_state.component_mapping:
+            st.subheader("LLM Output")
+            st.code(joined.get("mappings", ""), language=None)
+    else:
+        st.caption("No component mapping data yet.")
+
+
+def render_graph_structure_tab():
+    """Render the graph structure prompt input and output."""
+    if st.session_state.explanation and st.session_state.component_mapping:
+        joined = st.session_state.joined
+        llm_input = (
+            f"<explanation>\n{st.session_state.explanation}\n</explanation>\n\n"
+            f"<component_mapping>\n{joined.get('mappings', '')}\n</component_mapping>"
+        )
+        st.code(llm_input, language=None)
+        if st.session_state.graph_structure:
+            st.subheader("LLM Output")
+            llm_output = (
+                f"NODES:\n{joined.get('nodes', '')}\n\n"
+                f"EDGES:\n{joined.get('edges', '')}"
+            )
+            st.code(llm_output, language=None)
+    else:
+        st.caption("No graph structure data yet.")
+
+
 init_session_state()
 st.title("Gitsplain")
 st.markdown("Visualize any codebase in seconds.")
@@ -68,18 +197,48 @@ if repo_input:
 if owner and repo:
     if st.button("Generate Diagram", type="primary"):
         github_client = GitHubClient()
-        if not github_client.check_repository_exists(owner, repo):
+        # The head lookup doubles as the existence check
+        head_sha = github_client.get_head_sha(owner, repo)
+        request_key = (owner, repo, head_sha, instructions)
+        if head_sha is None:
             st.error(f"Repository **{owner}/{repo}** not found or is private.")
+        elif request_key == st.session_state.last_request_key:
+            st.toast("Diagram is up to date with the latest commit.")
         else:
-            with st.spinner("Generating architecture diagram..."):
-                generator = get_diagram_generator()
-                state = generator.run_all(owner, repo, instructions)
+            with st.status("Fetching repository...", expanded=True) as status:
+
+                def on_phase(phase: str, state: GenerationState) -> None:
+                    # Session state is only written once every step succeeds
+                    status.update(label=PHASE_LABELS[phase])
+
+                def on_partial(phase: str, partial: dict[str, Any]) -> None:
+                    # Count items as the LLM streams them
+                    if phase == "component_mapping":
+                        found = len(partial.get("mappings", []))
+                        status.update(label=f"Mapping components... ({found} found)")
+                    else:
+                        found = len(partial.get("nodes", []))
+                        status.update(label=f"Building the graph... ({found} nodes)")
+
+                state = generate_diagram(
+                    owner,
+                    repo,
+                    head_sha,
+                    instructions,
+                    _on_phase=on_phase,
+                    _on_partial=on_partial,
+                )
                 st.session_state.graph_html = state.graph_html
                 st.session_state.repo_info = state.repo_info
                 st.session_state.static_analysis = state.static_analysis
                 st.session_state.explanation = state.explanation
                 st.session_state.component_mapping = state.component_mapping
                 st.session_state.graph_structure = state.graph_structure
+                st.session_state.joined = join_state_strings(state)
+                st.session_state.last_request_key = request_key
+                status.update(
+                    label=PHASE_LABELS["graph_html"], state="complete", expanded=False
+                )
 
 
 # Tabs for graph and step outputs
@@ -95,72 +254,16 @@ tab_graph, tab_repo_analysis, tab_explanation, tab_mapping, tab_graph_struct = s
 
 
 with tab_graph:
-    if st.session_state.graph_html:
-        components.html(st.session_state.graph_html, height=600, scrolling=True)
-    else:
-        st.info("Enter a repository and click 'Generate Diagram' to visualize.")
-
+    render_graph_tab()
 
 with tab_repo_analysis:
-    if st.session_state.repo_info:
-        file_tree = "\n".join(st.session_state.repo_info.get("file_tree", []))
-        readme = st.session_state.repo_info.get("readme", "")
-        symbols = ""
-        if st.session_state.static_analysis:
-            symbol_list = st.session_state.static_analysis.get("symbols", [])
-            symbols = "\n".join(str(s) for s in symbol_list)
-        llm_input = (
-            f"<filetree>\n{file_tree}\n</filetree>\n\n"
-            f"<symbols>\n{symbols}\n</symbols>\n\n"
-            f"<readme>\n{readme}\n</readme>"
-        )
-        st.code(llm_input, language=None)
-    else:
-        st.caption("No repository data yet.")
+    render_repo_analysis_tab()
 
 with tab_explanation:
-    if st.session_state.explanation:
-        st.subheader("LLM Output")
-        st.code(st.session_state.explanation, language=None)
-    else:
-        st.caption("No explanation generated yet.")
+    render_explanation_tab()
 
 with tab_mapping:
-    if st.session_state.explanation:
-        file_tree = "\n".join(st.session_state.repo_info.get("file_tree", []))
-        symbol_list = st.session_state.static_analysis.get("symbols", [])
-        symbols = "\n".join(str(s) for s in symbol_list)
-        llm_input = (
-            f"<explanation>\n{st.session_state.explanation}\n</explanation>\n\n"
-            f"<file_tree>\n{file_tree}\n</file_tree>\n\n"
-            f"<symbols>\n{symbols}\n</symbols>"
-        )
-        st.code(llm_input, language=None)
-        if st.session_state.component_mapping:
-            st.subheader("LLM Output")
-            mappings = st.session_state.component_mapping.get("mappings", [])
-            llm_output = "\n".join(str(m) for m in mappings)
-            st.code(llm_output, language=None)
-    else:
-        st.caption("No component mapping data yet.")
-
+    render_mapping_tab()
 
 with tab_graph_struct:
-    if st.session_state.explanation and st.session_state.component_mapping:
-        mappings = st.session_state.component_mapping.get("mappings", [])
-        component_mapping_str = "\n".join(str(m) for m in mappings)
-        llm_input = (
-            f"<explanation>\n{st.session_state.explanation}\n</explanation>\n\n"
-            f"<component_mapping>\n{component_mapping_str}\n</component_mapping>"
-        )
-        st.code(llm_input, language=None)
-        if st.session_state.graph_structure:
-            st.subheader("LLM Output")
-            nodes = st.session_state.graph_structure.get("nodes", [])
-            edges = st.session_state.graph_structure.get("edges", [])
-            nodes_str = "\n".join(str(n) for n in nodes)
-            edges_str = "\n".join(str(e) for e in edges)
-            llm_output = f"NODES:\n{nodes_str}\n\nEDGES:\n{edges_str}"
-            st.code(llm_output, language=None)
-    else:
-        st.caption("No graph structure data yet.")
+    render_graph_structure_tab()
@@ -1,5 +1,8 @@
 """Diagram generator for repository architecture visualization."""
 
+import functools
+from collections.abc import Callable, Iterator
+from concurrent.futures import Future, ThreadPoolExecutor
 from dataclasses import dataclass, field
 from typing import Any, Optional
 
@@ -8,18 +11,22 @@ from loguru import logger
 from gitsplain.prompts.analysis import ANALYSIS_PROMPT
 from gitsplain.prompts.diagram import GRAPH_PROMPT, GraphResponse
 from gitsplain.prompts.mapping import MAPPING_PROMPT_STRUCTURED, MappingResponse
-from gitsplain.services.ast_parser import EXTENSION_TO_LANGUAGE, ASTParser
+from gitsplain.services.ast_parser import PARSEABLE_EXTENSIONS, ASTParser
 from gitsplain.services.github import GitHubClient
 from gitsplain.services.llm import LLMClient
 from gitsplain.services.renderer import MermaidRenderer
 
+# Maximum number of source files fetched and parsed per repository
+MAX_PARSE_FILES = 50
 
-@dataclass
+
+@dataclass(slots=True)
 class GenerationState:
     """Accumulates results through diagram generation."""
 
     owner: str = ""
     repo: str = ""
+    ref: str | None = None
     instructions: str = ""
     repo_info: dict[str, Any] = field(default_factory=dict)
     static_analysis: dict[str, Any] = field(default_factory=dict)
@@ -29,6 +36,17 @@ class GenerationState:
     graph_html: str = ""
 
 
+def _parseable_files(file_tree: list[str]) -> list[str]:
+    """Return the paths in the file tree that the AST parser supports."""
+    return [f for f in file_tree if f.endswith(PARSEABLE_EXTENSIONS)]
+
+
+@functools.lru_cache(maxsize=1)
+def _get_ast_parser() -> ASTParser:
+    """Return a shared parser so tree-sitter grammars load once per process."""
+    return ASTParser()
+
+
 class DiagramGenerator:
     """Generates architecture diagrams from repository analysis."""
 
@@ -42,35 +60,57 @@ class DiagramGenerator:
         self.github = github_client or GitHubClient()
         self.llm = llm_client or LLMClient()
         self.renderer = renderer or MermaidRenderer()
+        # File contents fetched in the background by fetch_repo_info
+        self._prefetch: Future[dict[str, str]] | None = None
+        self._prefetch_paths: list[str] = []
+
+    def fetch_repo_info(
+        self, owner: str, repo: str, ref: str | None = None
+    ) -> dict[str, Any]:
+        """Fetch repository information from GitHub.
 
-    def fetch_repo_info(self, owner: str, repo: str) -> dict[str, Any]:
-        """Fetch repository information from GitHub."""
+        Source file contents are prefetched as soon as the file tree is known,
+        overlapping with the remaining metadata requests. Pass a commit SHA as
+        `ref` so the tree, README and contents all describe that commit;
+        otherwise the default branch is read.
+        """
         self.state.owner = owner
         self.state.repo = repo
+        self.state.ref = ref
 
-        repo_data = self.github.get_repo_data(owner, repo)
-        languages = self.github.get_languages(owner, repo)
+        # Calls are network-bound and independent, so overlap them
+        pool = ThreadPoolExecutor(max_workers=4)
+        try:
+            tree_future = pool.submit(self.github.get_file_tree, owner, repo, ref)
+            readme_future = pool.submit(self.github.get_readme, owner, repo, ref)
+            branch_future = pool.submit(self.github.get_default_branch, owner, repo)
+            languages_future = pool.submit(self.github.get_languages, owner, repo)
 
-        self.state.repo_info = {
-            "owner": owner,
-            "repo": repo,
-            "default_branch": repo_data.get("default_branch", "main"),
-            "file_tree": repo_data.get("file_tree", "").split("\n"),
-            "readme": repo_data.get("readme", ""),
-            "languages": languages,
-        }
+            file_tree = tree_future.result().split("\n")
+            self._prefetch_paths = _parseable_files(file_tree)[:MAX_PARSE_FILES]
+            self._prefetch = pool.submit(
+                self.github.get_files_content, owner, repo, self._prefetch_paths, ref
+            )
+
+            self.state.repo_info = {
+                "owner": owner,
+                "repo": repo,
+                "default_branch": branch_future.result() or "main",
+                "file_tree": file_tree,
+                "readme": readme_future.result(),
+                "languages": languages_future.result(),
+            }
+        finally:
+            # Let the prefetch finish in the background
+            pool.shutdown(wait=False)
         return self.state.repo_info
 
-    def analyze_symbols(self, max_files: int = 50) -> dict[str, Any]:
+    def analyze_symbols(self, max_files: int = MAX_PARSE_FILES) -> dict[str, Any]:
         """Perform static analysis using AST parsing."""
-        parser = ASTParser()
+        parser = _get_ast_parser()
         file_tree = self.state.repo_info.get("file_tree", [])
 
-        parseable_files = [
-            f
-            for f in file_tree
-            if any(f.endswith(ext) for ext in EXTENSION_TO_LANGUAGE)
-        ]
+        parseable_files = _parseable_files(file_tree)
         logger.info(f"Found {len(parseable_files)} parseable files")
 
         files_to_parse = parseable_files[:max_files]
@@ -79,14 +119,25 @@ class DiagramGenerator:
                 f"Limiting to {max_files} files (skipping {len(parseable_files) - max_files})"
             )
 
-        file_contents = self.github.get_files_content(
-            self.state.owner, self.state.repo, files_to_parse
-        )
+        if self._prefetch and self._prefetch_paths == files_to_parse:
+            file_contents = self._prefetch.result()
+        else:
+            file_contents = self.github.get_files_content(
+                self.state.owner, self.state.repo, files_to_parse, self.state.ref
+            )
+        self._prefetch = None
         all_symbols = parser.extract_from_files(file_contents)
 
-        total_classes = sum(1 for s in all_symbols if s.kind != "function")
-        total_functions = sum(1 for s in all_symbols if s.kind == "function")
-        files_parsed = len(set(s.filepath for s in all_symbols))
+        total_classes = 0
+        total_functions = 0
+        parsed_paths: set[str] = set()
+        for symbol in all_symbols:
+            if symbol.kind == "function":
+                total_functions += 1
+            else:
+                total_classes += 1
+            parsed_paths.add(symbol.filepath)
+        files_parsed = len(parsed_paths)
 
         self.state.static_analysis = {
             "languages": self.state.repo_info.get("languages", {}),
@@ -115,8 +166,13 @@ class DiagramGenerator:
         self.state.explanation = response
         return self.state.explanation
 
-    def map_components(self) -> dict[str, Any]:
-        """Map files to architectural components using LLM."""
+    def map_components(
+        self, on_partial: Callable[[dict[str, Any]], None] | None = None
+    ) -> dict[str, Any]:
+        """Map files to architectural components using LLM.
+
+        `on_partial` receives the partially parsed mapping while it streams.
+        """
         file_tree = "\n".join(self.state.repo_info.get("file_tree", []))
         symbol_list = self.state.static_analysis.get("symbols", [])
         symbols = "\n".join(str(s) for s in symbol_list)
@@ -129,6 +185,7 @@ class DiagramGenerator:
                 "symbols": symbols,
             },
             response_model=MappingResponse,
+            on_partial=on_partial,
         )
 
         component_to_paths: dict[str, list[str]] = {}
@@ -143,8 +200,13 @@ class DiagramGenerator:
         }
         return self.state.component_mapping
 
-    def build_graph(self) -> dict[str, Any]:
-        """Build the graph structure using LLM."""
+    def build_graph(
+        self, on_partial: Callable[[dict[str, Any]], None] | None = None
+    ) -> dict[str, Any]:
+        """Build the graph structure using LLM.
+
+        `on_partial` receives the partially parsed graph while it streams.
+        """
         mappings = self.state.component_mapping.get("mappings", [])
         component_mapping_str = "\n".join(str(m) for m in mappings)
 
@@ -155,6 +217,7 @@ class DiagramGenerator:
                 "component_mapping": component_mapping_str,
             },
             response_model=GraphResponse,
+            on_partial=on_partial,
         )
 
         self.state.graph_structure = {
@@ -170,15 +233,48 @@ class DiagramGenerator:
         self.state.graph_html = self.renderer.render_html(nodes, edges)
         return self.state.graph_html
 
-    def run_all(self, owner: str, repo: str, instructions: str = "") -> GenerationState:
-        """Run all steps and return the state."""
+    def run_all_iter(
+        self,
+        owner: str,
+        repo: str,
+        instructions: str = "",
+        on_partial: Callable[[str, dict[str, Any]], None] | None = None,
+        ref: str | None = None,
+    ) -> Iterator[tuple[str, GenerationState]]:
+        """Run all steps, yielding the completed step's state field and the state.
+
+        `on_partial` is called with the step's state field and the partially
+        parsed LLM output while the mapping and graph responses stream. `ref`
+        pins the repository snapshot, as in `fetch_repo_info`.
+        """
         self.state.instructions = instructions
-        self.fetch_repo_info(owner, repo)
+        self.fetch_repo_info(owner, repo, ref)
+        yield "repo_info", self.state
         self.analyze_symbols()
+        yield "static_analysis", self.state
         self.generate_explanation()
-        self.map_components()
-        self.build_graph()
+        yield "explanation", self.state
+        self.map_components(
+            on_partial=functools.partial(on_partial, "component_mapping")
+            if on_partial
+            else None
+        )
+        yield "component_mapping", self.state
+        self.build_graph(
+            on_partial=functools.partial(on_partial, "graph_structure")
+            if on_partial
+            else None
+        )
+        yield "graph_structure", self.state
         self.generate_html()
+        yield "graph_html", self.state
+
+    def run_all(
+        self, owner: str, repo: str, instructions: str = "", ref: str | None = None
+    ) -> GenerationState:
+        """Run all steps and return the state."""
+        for _ in self.run_all_iter(owner, repo, instructions, ref=ref):
+            pass
         return self.state
 
 
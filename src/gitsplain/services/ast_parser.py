@@ -1,5 +1,10 @@
 """AST parser for extracting code symbols."""
 
+import hashlib
+import itertools
+import os
+import threading
+from collections import OrderedDict
 from dataclasses import dataclass
 from pathlib import Path
 from typing import Any, cast
@@ -43,6 +48,9 @@ EXTENSION_TO_LANGUAGE: dict[str, str] = {
     ".scala": "scala",
 }
 
+# Suffix tuple for a single C-level str.endswith check per path
+PARSEABLE_EXTENSIONS: tuple[str, ...] = tuple(EXTENSION_TO_LANGUAGE)
+
 # Tree-sitter node types for classes/structs/interfaces by language
 CLASS_NODE_TYPES: dict[str, set[str]] = {
     "python": {"class_definition"},
@@ -86,7 +94,38 @@ FUNCTION_NODE_TYPES: dict[str, set[str]] = {
 }
 
 
-@dataclass
+# Human-readable kinds for class-like node types (others stay "class")
+NODE_KIND_NAMES: dict[str, str] = {
+    # Classes
+    "class_definition": "class",
+    "class_declaration": "class",
+    "class_specifier": "class",
+    "object_declaration": "class",
+    "object_definition": "class",
+    # Structs
+    "struct_specifier": "struct",
+    "struct_item": "struct",
+    "struct_declaration": "struct",
+    "type_declaration": "struct",
+    # Interfaces and equivalents
+    "interface_declaration": "interface",
+    "trait_item": "interface",
+    "trait_definition": "interface",
+    "protocol_declaration": "interface",
+    "type_alias_declaration": "interface",
+}
+
+# Per-language node type -> normalized kind, so the walk does one dict lookup
+NODE_TYPE_TO_KIND: dict[str, dict[str, str]] = {
+    language: {
+        **dict.fromkeys(FUNCTION_NODE_TYPES.get(language, ()), "function"),
+        **{t: NODE_KIND_NAMES.get(t, "class") for t in class_types},
+    }
+    for language, class_types in CLASS_NODE_TYPES.items()
+}
+
+
+@dataclass(slots=True)
 class Symbol:
     """A code symbol (class, struct, interface, or function)."""
 
@@ -125,37 +164,92 @@ TEST_FILE_PATTERNS: dict[str, list[str]] = {
     ".scala": ["Test.scala", "Spec.scala"],
 }
 
+# Suffix and prefix tuples per extension for single str.endswith/startswith calls
+TEST_FILE_SUFFIXES: dict[str, tuple[str, ...]] = {
+    ext: tuple(patterns) for ext, patterns in TEST_FILE_PATTERNS.items()
+}
+TEST_FILE_PREFIXES: dict[str, tuple[str, ...]] = {
+    ext: tuple(p.lstrip(".") for p in patterns)
+    for ext, patterns in TEST_FILE_PATTERNS.items()
+}
+
+
+# Docstrings longer than this are truncated
+DOCSTRING_MAX_CHARS = 200
+
+# Tree-sitter parsers shared by every ASTParser in the process, so each
+# language library is loaded once per process
+_PARSERS: dict[str, Any] = {}
+_parsers_lock = threading.Lock()
+
+# Identifier node types used as names by grammars without a "name" field
+NAME_NODE_TYPES = frozenset(
+    {"name", "identifier", "property_identifier", "type_identifier"}
+)
+
+
+def _node_text(source: bytes, node) -> str:
+    """Decode a node's text by slicing the source bytes it was parsed from."""
+    return source[node.start_byte : node.end_byte].decode("utf-8")
+
+
+def _content_digest(source: bytes) -> bytes:
+    """Hash encoded file content for the symbol cache."""
+    return hashlib.blake2b(source, digest_size=16).digest()
+
+
+def _docstring_text(source: bytes, node) -> str:
+    """Decode a docstring node, stripped and truncated to DOCSTRING_MAX_CHARS.
+
+    Only a bounded prefix of long docstrings is decoded: a UTF-8 character is
+    at most 4 bytes, so the prefix usually holds enough text to truncate.
+    """
+    start, end = node.start_byte, node.end_byte
+    prefix_end = start + 4 * DOCSTRING_MAX_CHARS + 256
+    if prefix_end < end:
+        prefix = source[start:prefix_end].decode("utf-8", errors="ignore").strip()
+        if len(prefix) > DOCSTRING_MAX_CHARS:
+            return prefix[:DOCSTRING_MAX_CHARS] + "..."
+
+    docstring = source[start:end].decode("utf-8").strip()
+    if len(docstring) > DOCSTRING_MAX_CHARS:
+        docstring = docstring[:DOCSTRING_MAX_CHARS] + "..."
+    return docstring
+
 
 class ASTParser:
     """Parses source files and extracts code symbols."""
 
+    # Files whose symbols are kept for re-analysis of unchanged content
+    SYMBOL_CACHE_SIZE = 1024
+
     def __init__(self):
-        self._parsers: dict[str, Any] = {}
+        self._symbol_cache: OrderedDict[tuple[str, bytes], list[Symbol]] = OrderedDict()
+        self._symbol_cache_lock = threading.Lock()
 
     def _is_test_file(self, file_path: str) -> bool:
         """Check if a file is a test file based on path and naming conventions."""
-        path = Path(file_path)
-
         # Check if any parent directory is a test directory
-        for part in path.parts:
-            if part.lower() in TEST_DIR_PATTERNS:
-                return True
+        if not TEST_DIR_PATTERNS.isdisjoint(file_path.lower().split("/")):
+            return True
 
         # Check filename patterns based on extension
-        name = path.name
-        ext = path.suffix.lower()
-        patterns = TEST_FILE_PATTERNS.get(ext, [])
-        return any(name.endswith(p) or name.startswith(p.lstrip(".")) for p in patterns)
+        name = file_path.rpartition("/")[2]
+        ext = os.path.splitext(name)[1].lower()
+        return name.endswith(TEST_FILE_SUFFIXES.get(ext, ())) or name.startswith(
+            TEST_FILE_PREFIXES.get(ext, ())
+        )
 
     def _get_parser(self, language: str):
-        """Get or create a parser for the given language."""
-        if language not in self._parsers:
-            try:
-                self._parsers[language] = get_parser(cast(SupportedLanguage, language))
-            except Exception as e:
-                logger.warning(f"Failed to get parser for {language}: {e}")
-                return None
-        return self._parsers[language]
+        """Get or create the process-wide parser for the given language."""
+        with _parsers_lock:
+            if language not in _PARSERS:
+                try:
+                    _PARSERS[language] = get_parser(cast(SupportedLanguage, language))
+                except Exception as e:
+                    logger.warning(f"Failed to get parser for {language}: {e}")
+                    return None
+            return _PARSERS[language]
 
     def detect_language(self, file_path: str) -> str | None:
         """Detect language from file extension."""
@@ -163,13 +257,13 @@ class ASTParser:
         return EXTENSION_TO_LANGUAGE.get(ext)
 
     def extract_symbols(
-        self, content: str, file_path: str, language: str | None = None
+        self, content: str | bytes, file_path: str, language: str | None = None
     ) -> list[Symbol]:
         """
         Extract classes, structs, interfaces, and functions from source code.
 
         Args:
-            content: Source code content
+            content: Source code content, as text or UTF-8 bytes
             file_path: Path to the file (used for language detection if not specified)
             language: Tree-sitter language name (auto-detected if not provided)
 
@@ -186,25 +280,21 @@ class ASTParser:
             return []
 
         try:
-            tree = parser.parse(content.encode("utf-8"))
+            source = content.encode("utf-8") if isinstance(content, str) else content
+            tree = parser.parse(source)
         except Exception as e:
             logger.warning(f"Failed to parse {file_path}: {e}")
             return []
 
         symbols: list[Symbol] = []
 
-        class_types = CLASS_NODE_TYPES.get(language, set())
-        function_types = FUNCTION_NODE_TYPES.get(language, set())
-
         self._walk_tree(
             tree.root_node,
-            content,
+            source,
             file_path,
             language,
-            class_types,
-            function_types,
+            NODE_TYPE_TO_KIND.get(language, {}),
             symbols,
-            depth=0,
         )
 
         return symbols
@@ -212,116 +302,78 @@ class ASTParser:
     def _walk_tree(
         self,
         node,
-        content: str,
+        source: bytes,
         file_path: str,
         language: str,
-        class_types: set[str],
-        function_types: set[str],
+        node_kinds: dict[str, str],
         symbols: list[Symbol],
-        depth: int,
     ):
-        """Recursively walk the AST and extract symbols."""
-        # Only look at top-level and class-level definitions (depth 0-2)
-        if depth > 3:
-            return
-
-        if node.type in class_types:
-            symbol = self._extract_symbol(node, content, file_path, language, "class")
-            if symbol:
-                symbols.append(symbol)
-
-        elif node.type in function_types:
+        """Walk the AST with a tree cursor and extract symbols."""
+        cursor = node.walk()
+        depth = 0
+        while True:
+            current = cursor.node
+            kind = node_kinds.get(current.type)
             # Skip nested functions (only get top-level and methods)
-            if depth <= 2:
+            if kind and (kind != "function" or depth <= 2):
                 symbol = self._extract_symbol(
-                    node, content, file_path, language, "function"
+                    current, source, file_path, language, kind
                 )
                 if symbol:
                     symbols.append(symbol)
 
-        # Recurse
-        for child in node.children:
-            self._walk_tree(
-                child,
-                content,
-                file_path,
-                language,
-                class_types,
-                function_types,
-                symbols,
-                depth + 1,
-            )
+            # Only look at top-level and class-level definitions (depth 0-3)
+            if depth < 3 and cursor.goto_first_child():
+                depth += 1
+                continue
+
+            while not cursor.goto_next_sibling():
+                if depth == 0 or not cursor.goto_parent():
+                    return
+                depth -= 1
 
     def _extract_symbol(
-        self, node, content: str, file_path: str, language: str, kind: str
+        self, node, source: bytes, file_path: str, language: str, kind: str
     ) -> Symbol | None:
         """Extract symbol information from an AST node."""
-        name = self._get_name(node, language)
+        name = self._get_name(node, source, language)
         if not name:
             return None
 
-        # Normalize kind based on node type
-        actual_kind = self._normalize_kind(node.type, kind)
-
         # Try to get docstring (for Python)
         docstring = None
         if language == "python":
-            docstring = self._get_python_docstring(node, content)
+            docstring = self._get_python_docstring(node, source)
 
         return Symbol(
             name=name,
-            kind=actual_kind,
+            kind=kind,
             line=node.start_point[0] + 1,  # 1-indexed
             filepath=file_path,
             language=language,
             docstring=docstring,
         )
 
-    def _get_name(self, node, language: str) -> str | None:
+    def _get_name(self, node, source: bytes, language: str) -> str | None:
         """Extract the name from an AST node."""
-        # Language-specific name extraction
-        name_field_types = {
-            "name",
-            "identifier",
-            "property_identifier",
-            "type_identifier",
-        }
+        # Most grammars expose the declared name as a field, found in C
+        name_node = node.child_by_field_name("name")
+        if name_node is not None:
+            return _node_text(source, name_node)
 
+        # Grammars without a name field: scan children for an identifier
         for child in node.children:
-            if child.type in name_field_types:
-                return child.text.decode("utf-8")
+            if child.type in NAME_NODE_TYPES:
+                return _node_text(source, child)
             # For Go type declarations, look deeper
             if child.type == "type_spec":
-                for subchild in child.children:
-                    if subchild.type == "type_identifier":
-                        return subchild.text.decode("utf-8")
+                spec_name = child.child_by_field_name("name")
+                if spec_name is not None:
+                    return _node_text(source, spec_name)
 
         return None
 
-    def _normalize_kind(self, node_type: str, default_kind: str) -> str:
-        """Normalize the node type to a human-readable kind."""
-        kind_map = {
-            # Classes
-            "class_definition": "class",
-            "class_declaration": "class",
-            "class_specifier": "class",
-            "object_declaration": "class",
-            "object_definition": "class",
-            # Structs
-            "struct_specifier": "struct",
-            "struct_item": "struct",
-            "struct_declaration": "struct",
-            "type_declaration": "struct",
-            # Interfaces and equivalents
-            "interface_declaration": "interface",
-            "trait_item": "interface",
-            "trait_definition": "interface",
-            "protocol_declaration": "interface",
-            "type_alias_declaration": "interface",
-        }
-        return kind_map.get(node_type, default_kind)
-
-    def _get_python_docstring(self, node, content: str) -> str | None:
+    def _get_python_docstring(self, node, source: bytes) -> str | None:
         """Extract docstring from Python class or function."""
         # Look for string as first child of block (docstring)
         for child in node.children:
@@ -331,16 +383,12 @@ class ASTParser:
                         # Found a docstring - extract the content
                         for string_child in block_child.children:
                             if string_child.type == "string_content":
-                                docstring = string_child.text.decode("utf-8").strip()
-                                # Truncate long docstrings
-                                if len(docstring) > 200:
-                                    docstring = docstring[:200] + "..."
-                                return docstring
+                                return _docstring_text(source, string_child)
                         # Fallback: get full string and strip quotes
-                        docstring = block_child.text.decode("utf-8")
+                        docstring = _node_text(source, block_child)
                         docstring = docstring.strip('"""').strip("'''").strip()
-                        if len(docstring) > 200:
-                            docstring = docstring[:200] + "..."
+                        if len(docstring) > DOCSTRING_MAX_CHARS:
+                            docstring = docstring[:DOCSTRING_MAX_CHARS] + "..."
                         return docstring
                     elif block_child.type == "expression_statement":
                         # Also check expression_statement -> string pattern
@@ -348,12 +396,7 @@ class ASTParser:
                             if expr_child.type == "string":
                                 for string_child in expr_child.children:
                                     if string_child.type == "string_content":
-                                        docstring = string_child.text.decode(
-                                            "utf-8"
-                                        ).strip()
-                                        if len(docstring) > 200:
-                                            docstring = docstring[:200] + "..."
-                                        return docstring
+                                        return _docstring_text(source, string_child)
                     break  # Only check first non-trivial statement
         return None
 
@@ -370,10 +413,44 @@ class ASTParser:
         Returns:
             List of all extracted symbols
         """
-        all_symbols: list[Symbol] = []
+        keys: list[tuple[str, bytes]] = []
+        found: dict[tuple[str, bytes], list[Symbol]] = {}
+        missing: list[tuple[str, bytes]] = []
+        sources: list[bytes] = []
         for path, content in files.items():
             if exclude_tests and self._is_test_file(path):
                 continue
-            symbols = self.extract_symbols(content, path)
-            all_symbols.extend(symbols)
-        return all_symbols
+            # Encode once: the bytes are hashed and parsed
+            source = content.encode("utf-8", errors="replace")
+            key = (path, _content_digest(source))
+            keys.append(key)
+            cached = self._get_cached_symbols(key)
+            if cached is None:
+                missing.append(key)
+                sources.append(source)
+            else:
+                found[key] = cached
+
+        if found:
+            logger.debug(f"Reusing symbols for {len(found)} unchanged files")
+        parsed = [
+            self.extract_symbols(source, path)
+            for (path, _), source in zip(missing, sources)
+        ]
+        with self._symbol_cache_lock:
+            for key, symbols in zip(missing, parsed):
+                found[key] = symbols
+                self._symbol_cache[key] = symbols
+            while len(self._symbol_cache) > self.SYMBOL_CACHE_SIZE:
+                self._symbol_cache.popitem(last=False)
+
+        # Flatten per-file results in one C-level pass, in input order
+        return list(itertools.chain.from_iterable(map(found.__getitem__, keys)))
+
+    def _get_cached_symbols(self, key: tuple[str, bytes]) -> list[Symbol] | None:
+        """Look up symbols for an unchanged file, marking it recently used."""
+        with self._symbol_cache_lock:
+            symbols = self._symbol_cache.get(key)
+            if symbols is not None:
+                self._symbol_cache.move_to_end(key)
+            return symbols
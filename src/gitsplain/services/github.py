@@ -1,6 +1,10 @@
 """GitHub service for fetching repository data using PyGithub."""
 
 import os
+import re
+import threading
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
 from typing import Optional
 
 from github import Auth, Github, GithubException
@@ -11,7 +15,8 @@ from loguru import logger
 class GitHubClient:
     """Client for interacting with the GitHub API using PyGithub."""
 
-    EXCLUDED_PATTERNS = [
+    # Substring patterns, so an immutable tuple rather than a set
+    EXCLUDED_PATTERNS = (
         "node_modules/",
         "vendor/",
         "venv/",
@@ -42,27 +47,53 @@ class GitHubClient:
         ".vscode/",
         ".idea/",
         ".git/",
-    ]
+    )
+
+    # All exclusion patterns as one alternation, scanned in a single C-level pass
+    EXCLUDED_REGEX = re.compile("|".join(map(re.escape, EXCLUDED_PATTERNS)))
+
+    # Worker threads for concurrent requests; the connection pool is sized to
+    # match so every worker keeps a warm keep-alive connection
+    MAX_CONCURRENT_REQUESTS = 10
+
+    # Number of blobs requested per GraphQL query
+    GRAPHQL_BATCH_SIZE = 50
 
     def __init__(self, pat: Optional[str] = None):
         """Initialize the GitHub client."""
         self.token = pat or os.getenv("GITHUB_PAT")
+        # PyGithub spaces reads 0.25s apart by default, which serializes the
+        # concurrent fetches; secondary rate limits are still retried with backoff
+        options = {
+            "pool_size": self.MAX_CONCURRENT_REQUESTS,
+            "seconds_between_requests": None,
+        }
         if self.token:
-            self._client = Github(auth=Auth.Token(self.token))
+            self._client = Github(auth=Auth.Token(self.token), **options)
             logger.debug("GitHub client initialized with PAT")
         else:
-            self._client = Github()
+            self._client = Github(**options)
             logger.warning(
                 "No GitHub PAT - using unauthenticated requests (60 req/hour)"
             )
+        self._repos: dict[tuple[str, str], Repository] = {}
+        self._repos_lock = threading.Lock()
 
     def _get_repo(self, owner: str, repo: str) -> Repository:
-        """Get a repository object."""
-        return self._client.get_repo(f"{owner}/{repo}")
+        """Get a repository object, fetched once per client.
+
+        The lock makes concurrent callers wait for the first request instead of
+        each issuing their own. Failed lookups are not cached.
+        """
+        key = (owner, repo)
+        with self._repos_lock:
+            if key not in self._repos:
+                self._repos[key] = self._client.get_repo(f"{owner}/{repo}")
+            return self._repos[key]
 
     def _should_include_file(self, path: str) -> bool:
         """Check if a file should be included based on exclusion patterns."""
-        return not any(pattern in path.lower() for pattern in self.EXCLUDED_PATTERNS)
+        return self.EXCLUDED_REGEX.search(path.lower()) is None
 
     def check_repository_exists(self, owner: str, repo: str) -> bool:
         """Check if a repository exists."""
@@ -79,15 +110,33 @@ class GitHubClient:
         except GithubException:
             return None
 
-    def get_file_tree(self, owner: str, repo: str) -> str:
-        """Get the filtered file tree of a repository."""
+    def get_head_sha(self, owner: str, repo: str) -> Optional[str]:
+        """Get the commit SHA at the head of the default branch."""
+        try:
+            repository = self._get_repo(owner, repo)
+            return repository.get_branch(repository.default_branch).commit.sha
+        except GithubException:
+            return None
+
+    def get_file_tree(self, owner: str, repo: str, ref: str | None = None) -> str:
+        """Get the filtered file tree of a repository at `ref`.
+
+        `ref` defaults to the default branch.
+        """
         try:
             repository = self._get_repo(owner, repo)
-            tree = repository.get_git_tree(
-                sha=repository.default_branch, recursive=True
+            # Request the raw tree: wrapping every entry in a GitTreeElement
+            # dominates the cost of listing large repositories
+            tree_ref = urllib.parse.quote(ref or repository.default_branch, safe="")
+            _, tree = self._client.requester.requestJsonAndCheck(
+                "GET",
+                f"{repository.url}/git/trees/{tree_ref}",
+                parameters={"recursive": 1},
             )
 
-            all_paths = [item.path for item in tree.tree if item.type == "blob"]
+            all_paths = [
+                item["path"] for item in tree["tree"] if item["type"] == "blob"
+            ]
             paths = [p for p in all_paths if self._should_include_file(p)]
 
             logger.info(
@@ -100,11 +149,14 @@ class GitHubClient:
                 "Could not fetch file tree. Repo may not exist or be private."
             )
 
-    def get_readme(self, owner: str, repo: str) -> str:
-        """Get the README contents of a repository."""
+    def get_readme(self, owner: str, repo: str, ref: str | None = None) -> str:
+        """Get the README contents of a repository at `ref`.
+
+        `ref` defaults to the default branch.
+        """
         try:
             repository = self._get_repo(owner, repo)
-            readme = repository.get_readme()
+            readme = repository.get_readme(ref=ref or repository.default_branch)
             content = readme.decoded_content.decode("utf-8")
             logger.info(f"README fetched: {len(content)} chars")
             return content
@@ -114,21 +166,6 @@ class GitHubClient:
                 return ""
             raise ValueError(f"Failed to fetch README: {e}")
 
-    def get_repo_data(self, owner: str, repo: str) -> dict:
-        """Get all repository data needed for diagram generation."""
-        logger.info(f"Fetching repository data for {owner}/{repo}")
-
-        default_branch = self.get_default_branch(owner, repo) or "main"
-        file_tree = self.get_file_tree(owner, repo)
-        readme = self.get_readme(owner, repo)
-
-        logger.info(f"Repository data complete for {owner}/{repo}")
-        return {
-            "default_branch": default_branch,
-            "file_tree": file_tree,
-            "readme": readme,
-        }
-
     def get_languages(self, owner: str, repo: str) -> dict[str, int]:
         """Get language statistics for a repository."""
         try:
@@ -147,7 +184,15 @@ class GitHubClient:
         """Get the content of a specific file."""
         try:
             repository = self._get_repo(owner, repo)
-            content = repository.get_contents(path, ref=repository.default_branch)
+        except GithubException as e:
+            logger.debug(f"Failed to fetch {path}: {e}")
+            return None
+        return self._read_file(repository, repository.default_branch, path)
+
+    def _read_file(self, repository: Repository, ref: str, path: str) -> str | None:
+        """Read a file at a ref from an already resolved repository."""
+        try:
+            content = repository.get_contents(path, ref=ref)
             if isinstance(content, list):
                 return None  # It's a directory
             return content.decoded_content.decode("utf-8")
@@ -155,14 +200,85 @@ class GitHubClient:
             logger.debug(f"Failed to fetch {path}: {e}")
             return None
 
+    def _get_files_content_rest(
+        self, owner: str, repo: str, paths: list[str], ref: str | None = None
+    ) -> dict[str, str]:
+        """Get file contents with one REST request per file, run concurrently.
+
+        The repository and ref are resolved once up front so each worker only
+        issues the contents request for its file.
+        """
+        try:
+            repository = self._get_repo(owner, repo)
+        except GithubException as e:
+            logger.warning(f"Failed to fetch {owner}/{repo}: {e}")
+            return {}
+        ref = ref or repository.default_branch
+
+        with ThreadPoolExecutor(max_workers=self.MAX_CONCURRENT_REQUESTS) as pool:
+            contents = pool.map(
+                lambda path: self._read_file(repository, ref, path), paths
+            )
+            return {
+                path: content
+                for path, content in zip(paths, contents)
+                if content is not None
+            }
+
+    def _get_files_content_graphql(
+        self, owner: str, repo: str, paths: list[str], ref: str | None = None
+    ) -> dict[str, str]:
+        """Get file contents with batched GraphQL blob queries."""
+        rev = ref or "HEAD"
+        results: dict[str, str] = {}
+        truncated: list[str] = []
+        for start in range(0, len(paths), self.GRAPHQL_BATCH_SIZE):
+            batch = paths[start : start + self.GRAPHQL_BATCH_SIZE]
+            params = "".join(f", $e{i}: String!" for i in range(len(batch)))
+            fields = " ".join(
+                f"f{i}: object(expression: $e{i}) "
+                "{ ... on Blob { text isTruncated } }"
+                for i in range(len(batch))
+            )
+            query = (
+                f"query($owner: String!, $name: String!{params}) "
+                f"{{ repository(owner: $owner, name: $name) {{ {fields} }} }}"
+            )
+            variables = {"owner": owner, "name": repo}
+            variables.update({f"e{i}": f"{rev}:{path}" for i, path in enumerate(batch)})
+
+            _, data = self._client.requester.graphql_query(query, variables)
+            blobs = data["data"]["repository"]
+            for i, path in enumerate(batch):
+                blob = blobs.get(f"f{i}")
+                if not blob or blob.get("text") is None:
+                    continue  # Missing path or binary blob
+                if blob.get("isTruncated"):
+                    truncated.append(path)
+                    continue
+                results[path] = blob["text"]
+
+        if truncated:
+            results.update(self._get_files_content_rest(owner, repo, truncated, ref))
+        return results
+
     def get_files_content(
-        self, owner: str, repo: str, paths: list[str]
+        self, owner: str, repo: str, paths: list[str], ref: str | None = None
     ) -> dict[str, str]:
-        """Get the content of multiple files."""
-        results = {}
-        for path in paths:
-            content = self.get_file_content(owner, repo, path)
-            if content is not None:
-                results[path] = content
+        """Get the content of multiple files at `ref`.
+
+        `ref` defaults to the default branch; pass a commit SHA to read the same
+        snapshot as the file tree. Authenticated clients batch all files into
+        GraphQL queries; GraphQL is unavailable without a token, so anonymous
+        clients use concurrent REST.
+        """
+        if self.token:
+            try:
+                results = self._get_files_content_graphql(owner, repo, paths, ref)
+            except GithubException as e:
+                logger.warning(f"GraphQL fetch failed, falling back to REST: {e}")
+                results = self._get_files_content_rest(owner, repo, paths, ref)
+        else:
+            results = self._get_files_content_rest(owner, repo, paths, ref)
         logger.info(f"Fetched content for {len(results)}/{len(paths)} files")
         return results
@@ -1,41 +1,72 @@
 """LLM client using LangChain with OpenAI."""
 
+import functools
 import os
-from collections.abc import Iterator
-from typing import cast
+from collections.abc import Callable, Iterator
+from typing import Any, cast
 
 from langchain_core.prompts import ChatPromptTemplate
+from langchain_core.runnables import Runnable
+from langchain_core.utils.json import parse_partial_json
 from langchain_openai import ChatOpenAI
 from loguru import logger
 from pydantic import BaseModel, ValidationError
 
 
+@functools.lru_cache(maxsize=16)
+def _prompt_template(system_prompt: str, keys: tuple[str, ...]) -> ChatPromptTemplate:
+    """Build the prompt template for a system prompt and input keys.
+
+    Prompts are module constants, so each template is parsed once per process.
+    """
+    # Escape curly braces in system prompt (e.g. JSON examples)
+    escaped_system = system_prompt.replace("{", "{{").replace("}", "}}")
+    parts = [f"<{k}>\n{{{k}}}\n</{k}>" for k in keys]
+    user_template = "\n\n".join(parts)
+    return ChatPromptTemplate.from_messages(
+        [
+            ("system", escaped_system),
+            ("user", user_template),
+        ]
+    )
+
+
+@functools.lru_cache(maxsize=8)
+def _chat_model(model_name: str, api_key: str | None) -> ChatOpenAI:
+    """Build the chat model for a model name and key.
+
+    A new LLMClient is created per generation, so the model is shared here to
+    keep its HTTP connections and structured-output runnables across runs.
+    """
+    return ChatOpenAI(
+        model=model_name,  # type: ignore[call-arg]
+        temperature=0,
+        api_key=api_key,  # type: ignore[call-arg]
+    )
+
+
+@functools.lru_cache(maxsize=16)
+def _structured_llm(
+    model_name: str, api_key: str | None, response_model: type[BaseModel]
+) -> Runnable:
+    """Build the structured-output runnable for a response model once per process."""
+    return _chat_model(model_name, api_key).with_structured_output(response_model)
+
+
 class LLMClient:
     """LLM client using LangChain abstractions."""
 
     def __init__(self, api_key: str | None = None):
         self.model_name = os.getenv("OPENAI_MODEL", "gpt-4o-mini")
-        self._client = ChatOpenAI(
-            model=self.model_name,  # type: ignore[call-arg]
-            temperature=0,
-            api_key=api_key or os.getenv("OPENAI_API_KEY"),  # type: ignore[call-arg]
-        )
+        self._api_key = api_key or os.getenv("OPENAI_API_KEY")
+        self._client = _chat_model(self.model_name, self._api_key)
         logger.debug(f"LLMClient initialized: {self.model_name}")
 
     def _build_prompt(
         self, system_prompt: str, data: dict[str, str]
     ) -> ChatPromptTemplate:
         """Build a ChatPromptTemplate from system prompt and data."""
-        # Escape curly braces in system prompt (e.g. JSON examples)
-        escaped_system = system_prompt.replace("{", "{{").replace("}", "}}")
-        parts = [f"<{k}>\n{{{k}}}\n</{k}>" for k in data]
-        user_template = "\n\n".join(parts)
-        return ChatPromptTemplate.from_messages(
-            [
-                ("system", escaped_system),
-                ("user", user_template),
-            ]
-        )
+        return _prompt_template(system_prompt, tuple(data))
 
     def call_api(self, system_prompt: str, data: dict[str, str]) -> str:
         """Make a non-streaming API call."""
@@ -59,23 +90,45 @@ class LLMClient:
 
         logger.info(f"LLM stream | model={self.model_name}")
         for chunk in chain.stream(data):
-            if chunk.content:
-                yield str(chunk.content)
+            content = chunk.content
+            if not content:
+                continue
+            if isinstance(content, str):
+                yield content
+            else:
+                # Content blocks: keep only the text parts
+                text = "".join(
+                    part if isinstance(part, str) else part.get("text", "")
+                    for part in content
+                )
+                if text:
+                    yield text
 
     def call_api_structured[T: BaseModel](
         self,
         system_prompt: str,
         data: dict[str, str],
         response_model: type[T],
+        on_partial: Callable[[dict[str, Any]], None] | None = None,
     ) -> T:
-        """Make an API call expecting structured JSON response."""
-        prompt = self._build_prompt(system_prompt, data)
-        structured_llm = self._client.with_structured_output(response_model)
-        chain = prompt | structured_llm
+        """Make an API call expecting structured JSON response.
 
-        logger.info(f"LLM structured | model={self.model_name}")
+        When `on_partial` is given, the response is streamed and the callback
+        receives the partially parsed JSON each time an object closes.
+        """
+        prompt = self._build_prompt(system_prompt, data)
         try:
-            response = chain.invoke(data)
+            if on_partial:
+                response = self._stream_structured(
+                    prompt, data, response_model, on_partial
+                )
+            else:
+                structured = _structured_llm(
+                    self.model_name, self._api_key, response_model
+                )
+                chain = prompt | structured
+                logger.info(f"LLM structured | model={self.model_name}")
+                response = chain.invoke(data)
             if response is None:
                 raise ValueError("No content returned from LLM")
             return cast(T, response)
@@ -83,6 +136,33 @@ class LLMClient:
             logger.error(f"Parse failed: {e}")
             raise ValueError(f"Invalid response format: {e}")
 
+    def _stream_structured[T: BaseModel](
+        self,
+        prompt: ChatPromptTemplate,
+        data: dict[str, str],
+        response_model: type[T],
+        on_partial: Callable[[dict[str, Any]], None],
+    ) -> T:
+        """Stream a JSON-schema response, reporting partial objects as they close."""
+        chain = prompt | self._client.bind(response_format=response_model)
+
+        logger.info(f"LLM structured stream | model={self.model_name}")
+        buffer = ""
+        for chunk in chain.stream(data):
+            content = chunk.content
+            if not isinstance(content, str) or not content:
+                continue
+            buffer += content
+            # Only re-parse when an object may have completed
+            if "}" in content:
+                partial = parse_partial_json(buffer)
+                if partial:
+                    on_partial(partial)
+
+        if not buffer:
+            raise ValueError("No content returned from LLM")
+        return response_model.model_validate_json(buffer)
+
 
 if __name__ == "__main__":
     from dotenv import load_dotenv
@@ -1,59 +1,18 @@
 """Graph renderer for generating Mermaid diagrams."""
 
-from gitsplain.prompts.diagram import GraphEdge, GraphNode
-
-
-class MermaidRenderer:
-    """Renders graphs to Mermaid diagrams."""
-
-    GROUP_COLORS = {
-        "frontend": "#4CAF50",
-        "backend": "#2196F3",
-        "database": "#9C27B0",
-        "service": "#FF9800",
-        "external": "#607D8B",
-        "config": "#795548",
-    }
-
-    def render_mermaid(self, nodes: list[GraphNode], edges: list[GraphEdge]) -> str:
-        """Generate Mermaid flowchart code."""
-        lines = ["flowchart TD"]
-
-        for node in nodes:
-            node_id = node.id if hasattr(node, "id") else node["id"]
-            label = node.label if hasattr(node, "label") else node["label"]
-            lines.append(f'    {node_id}["{label}"]')
-
-        for edge in edges:
-            source = edge.source if hasattr(edge, "source") else edge["source"]
-            target = edge.target if hasattr(edge, "target") else edge["target"]
-            label = edge.label if hasattr(edge, "label") else edge.get("label")
-            if label:
-                lines.append(f"    {source} -->|{label}| {target}")
-            else:
-                lines.append(f"    {source} --> {target}")
-
-        for node in nodes:
-            node_id = node.id if hasattr(node, "id") else node["id"]
-            group = (
-                node.group if hasattr(node, "group") else node.get("group", "service")
-            )
-            color = self.GROUP_COLORS.get(group, "#666")
-            lines.append(f"    style {node_id} fill:{color},color:#fff")
-
-        return "\n".join(lines)
+from collections.abc import Iterator
 
-    def render_html(self, nodes: list[GraphNode], edges: list[GraphEdge]) -> str:
-        """Generate HTML page with Mermaid diagram."""
-        mermaid_code = self.render_mermaid(nodes, edges)
+from gitsplain.prompts.diagram import GraphEdge, GraphNode
 
-        return f"""<!DOCTYPE html>
+# Static HTML around the Mermaid code; plain literals, so CSS and JS braces
+# need no f-string escaping
+_HTML_PREFIX = """<!DOCTYPE html>
 <html>
 <head>
     <meta charset="UTF-8">
     <script src="https://cdn.jsdelivr.net/npm/mermaid/dist/mermaid.min.js"></script>
     <style>
-        body {{
+        body {
             font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, sans-serif;
             display: flex;
             justify-content: center;
@@ -61,21 +20,85 @@ class MermaidRenderer:
             min-height: 100vh;
             margin: 0;
             background: #fafafa;
-        }}
-        .mermaid {{
+        }
+        .mermaid {
             background: white;
             padding: 20px;
             border-radius: 8px;
             box-shadow: 0 2px 4px rgba(0,0,0,0.1);
-        }}
+        }
     </style>
 </head>
 <body>
     <div class="mermaid">
-{mermaid_code}
+"""
+
+_HTML_SUFFIX = """
     </div>
     <script>
-        mermaid.initialize({{ startOnLoad: true, theme: 'default' }});
+        mermaid.initialize({ startOnLoad: true, theme: 'default' });
     </script>
 </body>
 </html>"""
+
+
+def _node_fields(node: GraphNode | dict) -> tuple[str, str, str]:
+    """Read (id, label, group) from a node model or a plain dict."""
+    if isinstance(node, dict):
+        return node["id"], node["label"], node.get("group", "service")
+    return node.id, node.label, node.group
+
+
+def _edge_fields(edge: GraphEdge | dict) -> tuple[str, str, str | None]:
+    """Read (source, target, label) from an edge model or a plain dict."""
+    if isinstance(edge, dict):
+        return edge["source"], edge["target"], edge.get("label")
+    return edge.source, edge.target, edge.label
+
+
+class MermaidRenderer:
+    """Renders graphs to Mermaid diagrams."""
+
+    GROUP_COLORS = {
+        "frontend": "#4CAF50",
+        "backend": "#2196F3",
+        "database": "#9C27B0",
+        "service": "#FF9800",
+        "external": "#607D8B",
+        "config": "#795548",
+    }
+
+    # Style attributes per group, built once; unknown groups fall back to grey
+    GROUP_STYLES = {
+        group: f"fill:{color},color:#fff" for group, color in GROUP_COLORS.items()
+    }
+    DEFAULT_STYLE = "fill:#666,color:#fff"
+
+    def render_mermaid(self, nodes: list[GraphNode], edges: list[GraphEdge]) -> str:
+        """Generate Mermaid flowchart code."""
+        return "\n".join(self._iter_mermaid(nodes, edges))
+
+    def _iter_mermaid(
+        self, nodes: list[GraphNode], edges: list[GraphEdge]
+    ) -> Iterator[str]:
+        """Yield Mermaid flowchart lines: nodes, then edges, then styles."""
+        node_fields = [_node_fields(node) for node in nodes]
+
+        yield "flowchart TD"
+
+        for node_id, label, _ in node_fields:
+            yield f'    {node_id}["{label}"]'
+
+        for source, target, label in map(_edge_fields, edges):
+            if label:
+                yield f"    {source} -->|{label}| {target}"
+            else:
+                yield f"    {source} --> {target}"
+
+        styles = self.GROUP_STYLES
+        for node_id, _, group in node_fields:
+            yield f"    style {node_id} {styles.get(group, self.DEFAULT_STYLE)}"
+
+    def render_html(self, nodes: list[GraphNode], edges: list[GraphEdge]) -> str:
+        """Generate HTML page with Mermaid diagram."""
+        return _HTML_PREFIX + self.render_mermaid(nodes, edges) + _HTML_SUFFIX
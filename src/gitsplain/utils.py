@@ -26,9 +26,9 @@ def parse_github_url(url: str) -> tuple[str, str]:
     """
     # Handle direct owner/repo format
     if "/" in url and "github.com" not in url and "://" not in url:
-        parts = url.strip("/").split("/")
-        if len(parts) >= 2:
-            return parts[0], parts[1]
+        owner, sep, rest = url.strip("/").partition("/")
+        if sep:
+            return owner, rest.partition("/")[0]
 
     # Handle full GitHub URLs
     parsed = urlparse(url)
@@ -0,0 +1,20 @@
+"""Shared test fixtures."""
+
+from unittest.mock import Mock
+
+import pytest
+
+from gitsplain.services.github import GitHubClient
+from gitsplain.services.llm import LLMClient
+
+
+@pytest.fixture
+def mock_github():
+    """GitHub client mock restricted to the GitHubClient interface."""
+    return Mock(spec_set=GitHubClient)
+
+
+@pytest.fixture
+def mock_llm():
+    """LLM client mock restricted to the LLMClient interface."""
+    return Mock(spec_set=LLMClient)
@@ -1,5 +1,7 @@
 """Tests for AST parser."""
 
+from unittest.mock import patch
+
 from gitsplain.services.ast_parser import ASTParser, Symbol
 
 
@@ -43,6 +45,13 @@ class TestSymbol:
         )
         assert str(symbol) == "interface IService @ src/services.ts:8"
 
+    def test_uses_slots(self):
+        """Test instances carry no per-instance __dict__."""
+        symbol = Symbol(
+            name="Foo", kind="class", line=1, filepath="a.py", language="python"
+        )
+        assert not hasattr(symbol, "__dict__")
+
 
 class TestASTParser:
     """Tests for ASTParser class."""
@@ -71,6 +80,10 @@ class TestASTParser:
         assert parser.detect_language("README.md") is None
         assert parser.detect_language("data.json") is None
 
+    def test_parsers_shared_across_instances(self):
+        """Test tree-sitter parsers are cached per process, not per instance."""
+        assert ASTParser()._get_parser("python") is ASTParser()._get_parser("python")
+
     def test_extract_symbols_python_class(self):
         """Test extracting Python class."""
         parser = ASTParser()
@@ -101,6 +114,34 @@ class MyClass:
         assert symbols[0].kind == "function"
         assert symbols[0].docstring == "Do something."
 
+    def test_extract_symbols_normalizes_kinds(self):
+        """Test class-like node types map to struct and interface kinds."""
+        parser = ASTParser()
+        content = "struct Point { x: i32 }\ntrait Shape {}\nfn main() {}"
+        symbols = parser.extract_symbols(content, "src/main.rs")
+        assert [(s.name, s.kind) for s in symbols] == [
+            ("Point", "struct"),
+            ("Shape", "interface"),
+            ("main", "function"),
+        ]
+
+    def test_extract_symbols_uses_name_field(self):
+        """Test names come from the grammar's name field, e.g. Go methods."""
+        parser = ASTParser()
+        content = "package m\ntype S struct{}\nfunc (s S) Area() int { return 0 }"
+        symbols = parser.extract_symbols(content, "shapes.go")
+        assert [(s.name, s.kind) for s in symbols] == [
+            ("S", "struct"),
+            ("Area", "function"),
+        ]
+
+    def test_extract_symbols_truncates_long_docstring(self):
+        """Test long docstrings are cut to 200 characters."""
+        parser = ASTParser()
+        content = f'class Big:\n    """{"word " * 1000}"""\n'
+        symbols = parser.extract_symbols(content, "big.py")
+        assert symbols[0].docstring == ("word " * 40)[:200] + "..."
+
     def test_extract_symbols_empty_for_unknown_language(self):
         """Test that unknown file extensions return empty list."""
         parser = ASTParser()
@@ -139,3 +180,35 @@ class MyClass:
         }
         symbols = parser.extract_from_files(files, exclude_tests=False)
         assert len(symbols) == 2
+
+    def test_extract_from_files_parses_full_batch_in_process(self):
+        """Test a full analysis batch is parsed by this parser, in input order."""
+        parser = ASTParser()
+        files = {f"src/module_{i}.py": f"class Model{i}:\n    pass" for i in range(50)}
+        with patch.object(
+            parser, "extract_symbols", wraps=parser.extract_symbols
+        ) as mock_extract:
+            symbols = parser.extract_from_files(files)
+
+        assert mock_extract.call_count == 50
+        assert [s.name for s in symbols] == [f"Model{i}" for i in range(50)]
+
+    def test_extract_from_files_reuses_unchanged_files(self):
+        """Test only new or changed files are parsed on re-analysis."""
+        parser = ASTParser()
+        files = {
+            "src/models.py": "class User:\n    pass",
+            "src/utils.py": "def helper():\n    pass",
+        }
+        parser.extract_from_files(files)
+
+        files["src/utils.py"] = "def renamed():\n    pass"
+        with patch.object(
+            parser, "extract_symbols", wraps=parser.extract_symbols
+        ) as mock_extract:
+            symbols = parser.extract_from_files(files)
+
+        mock_extract.assert_called_once_with(
+            b"def renamed():\n    pass", "src/utils.py"
+        )
+        assert [s.name for s in symbols] == ["User", "renamed"]
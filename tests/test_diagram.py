@@ -1,8 +1,31 @@
 """Tests for diagram generator."""
 
-from unittest.mock import MagicMock, patch
+from types import MappingProxyType, SimpleNamespace
+from unittest.mock import DEFAULT, Mock, patch
+
+import pytest
 
 from gitsplain.diagram import DiagramGenerator, GenerationState, get_diagram_generator
+from gitsplain.services.github import GitHubClient
+from gitsplain.services.llm import LLMClient
+
+# Empty structured LLM responses; nothing under test mutates them
+_EMPTY_MAPPING = SimpleNamespace(mappings=[])
+_EMPTY_GRAPH = SimpleNamespace(nodes=[], edges=[])
+
+# Read-only client return values shared across tests
+_LANGUAGES = MappingProxyType({"Python": 1000})
+_SOURCE_FILES = MappingProxyType(
+    {
+        "src/models.py": "class User:\n    pass\n\ndef helper():\n    pass",
+        "src/views.py": "def index():\n    pass",
+    }
+)
+
+
+def _patched():
+    """Patch both service clients constructed by the diagram module."""
+    return patch.multiple("gitsplain.diagram", GitHubClient=DEFAULT, LLMClient=DEFAULT)
 
 
 class TestGenerationState:
@@ -13,6 +36,7 @@ class TestGenerationState:
         state = GenerationState()
         assert state.owner == ""
         assert state.repo == ""
+        assert state.ref is None
         assert state.instructions == ""
         assert state.repo_info == {}
         assert state.static_analysis == {}
@@ -21,38 +45,35 @@ class TestGenerationState:
         assert state.graph_structure == {}
         assert state.graph_html == ""
 
+    def test_uses_slots(self):
+        """Test instances carry no per-instance __dict__."""
+        state = GenerationState()
+        assert not hasattr(state, "__dict__")
+
 
 class TestDiagramGenerator:
     """Tests for DiagramGenerator class."""
 
     def test_init_creates_state(self):
         """Test initialization creates empty state."""
-        with (
-            patch("gitsplain.diagram.GitHubClient"),
-            patch("gitsplain.diagram.LLMClient"),
-        ):
+        with _patched():
             generator = DiagramGenerator()
             assert isinstance(generator.state, GenerationState)
 
-    def test_init_with_custom_client(self):
+    def test_init_with_custom_client(self, mock_github, mock_llm):
         """Test initialization with custom GitHub client."""
-        mock_github = MagicMock()
-        mock_llm = MagicMock()
         generator = DiagramGenerator(github_client=mock_github, llm_client=mock_llm)
         assert generator.github == mock_github
         assert generator.llm == mock_llm
 
-    def test_fetch_repo_info(self):
+    def test_fetch_repo_info(self, mock_github, mock_llm):
         """Test fetch_repo_info fetches and stores repo info."""
-        mock_github = MagicMock()
-        mock_github.get_repo_data.return_value = {
-            "default_branch": "main",
-            "file_tree": "src/main.py\nsrc/utils.py",
-            "readme": "# Test Repo",
-        }
-        mock_github.get_languages.return_value = {"Python": 1000}
+        mock_github.get_default_branch.return_value = "main"
+        mock_github.get_file_tree.return_value = "src/main.py\nsrc/utils.py"
+        mock_github.get_readme.return_value = "# Test Repo"
+        mock_github.get_languages.return_value = _LANGUAGES
 
-        generator = DiagramGenerator(github_client=mock_github, llm_client=MagicMock())
+        generator = DiagramGenerator(github_client=mock_github, llm_client=mock_llm)
         result = generator.fetch_repo_info("owner", "repo")
 
         assert generator.state.owner == "owner"
@@ -62,27 +83,75 @@ class TestDiagramGenerator:
         assert result["readme"] == "# Test Repo"
         assert result["languages"] == {"Python": 1000}
 
-    def test_analyze_symbols(self):
+    def test_fetch_repo_info_prefetches_file_contents(self, mock_github, mock_llm):
+        """Test analyze_symbols reuses contents prefetched by fetch_repo_info."""
+        mock_github.get_default_branch.return_value = "main"
+        mock_github.get_file_tree.return_value = "README.md\nsrc/models.py"
+        mock_github.get_readme.return_value = ""
+        mock_github.get_languages.return_value = {}
+        mock_github.get_files_content.return_value = {
+            "src/models.py": "class User:\n    pass"
+        }
+
+        generator = DiagramGenerator(github_client=mock_github, llm_client=mock_llm)
+        generator.fetch_repo_info("owner", "repo")
+        result = generator.analyze_symbols()
+
+        mock_github.get_files_content.assert_called_once_with(
+            "owner", "repo", ["src/models.py"], None
+        )
+        assert result["total_classes"] == 1
+
+    def test_fetch_repo_info_pins_ref(self, mock_github, mock_llm):
+        """Test the tree, README and contents are all read at the given ref."""
+        mock_github.get_default_branch.return_value = "main"
+        mock_github.get_file_tree.return_value = "src/models.py"
+        mock_github.get_readme.return_value = ""
+        mock_github.get_languages.return_value = {}
+        mock_github.get_files_content.return_value = {}
+
+        generator = DiagramGenerator(github_client=mock_github, llm_client=mock_llm)
+        generator.fetch_repo_info("owner", "repo", "abc123")
+        generator.analyze_symbols()
+
+        mock_github.get_file_tree.assert_called_once_with("owner", "repo", "abc123")
+        mock_github.get_readme.assert_called_once_with("owner", "repo", "abc123")
+        mock_github.get_files_content.assert_called_once_with(
+            "owner", "repo", ["src/models.py"], "abc123"
+        )
+
+    def test_analyze_symbols(self, mock_github, mock_llm):
         """Test analyze_symbols returns AST data."""
-        with (
-            patch("gitsplain.diagram.GitHubClient"),
-            patch("gitsplain.diagram.LLMClient"),
-        ):
-            generator = DiagramGenerator()
-            generator.state.repo_info = {"file_tree": [], "languages": {}}
-            result = generator.analyze_symbols()
+        mock_github.get_files_content.return_value = {}
+        generator = DiagramGenerator(github_client=mock_github, llm_client=mock_llm)
+        generator.state.repo_info = {"file_tree": [], "languages": {}}
+        result = generator.analyze_symbols()
+
+        assert result.keys() >= {"languages", "files_parsed", "symbols"}
+        assert generator.state.static_analysis == result
 
-            assert "languages" in result
-            assert "files_parsed" in result
-            assert "symbols" in result
-            assert generator.state.static_analysis == result
+    def test_analyze_symbols_counts(self, mock_github, mock_llm):
+        """Test analyze_symbols filters parseable files and tallies symbols."""
+        mock_github.get_files_content.return_value = _SOURCE_FILES
 
-    def test_generate_explanation(self):
+        generator = DiagramGenerator(github_client=mock_github, llm_client=mock_llm)
+        generator.state.repo_info = {
+            "file_tree": ["README.md", "src/models.py", "src/views.py"],
+            "languages": {},
+        }
+        result = generator.analyze_symbols()
+
+        requested = mock_github.get_files_content.call_args.args[2]
+        assert requested == ["src/models.py", "src/views.py"]
+        assert result["total_classes"] == 1
+        assert result["total_functions"] == 2
+        assert result["files_parsed"] == 2
+
+    def test_generate_explanation(self, mock_github, mock_llm):
         """Test generate_explanation returns explanation string."""
-        mock_llm = MagicMock()
         mock_llm.call_api.return_value = "This is the architecture explanation."
 
-        generator = DiagramGenerator(github_client=MagicMock(), llm_client=mock_llm)
+        generator = DiagramGenerator(github_client=mock_github, llm_client=mock_llm)
         generator.state.repo_info = {"file_tree": [], "readme": ""}
         generator.state.static_analysis = {"symbols": []}
         result = generator.generate_explanation()
@@ -91,41 +160,33 @@ class TestDiagramGenerator:
         assert result == "This is the architecture explanation."
         assert generator.state.explanation == result
 
-    def test_map_components(self):
+    def test_map_components(self, mock_github, mock_llm):
         """Test map_components returns component mapping."""
-        with (
-            patch("gitsplain.diagram.GitHubClient"),
-            patch("gitsplain.diagram.LLMClient") as mock_llm,
-        ):
-            mock_llm.return_value.call_api_structured.return_value = MagicMock(
-                mappings=[]
-            )
-            generator = DiagramGenerator()
-            generator.state.repo_info = {"file_tree": []}
-            generator.state.static_analysis = {"symbols": []}
-            generator.state.explanation = "Test explanation"
-            result = generator.map_components()
+        mock_llm.call_api_structured.return_value = _EMPTY_MAPPING
+        generator = DiagramGenerator(github_client=mock_github, llm_client=mock_llm)
+        generator.state.repo_info = {"file_tree": []}
+        generator.state.static_analysis = {"symbols": []}
+        generator.state.explanation = "Test explanation"
+        result = generator.map_components()
 
-            assert isinstance(result, dict)
-            assert generator.state.component_mapping == result
+        assert isinstance(result, dict)
+        assert generator.state.component_mapping == result
 
-    def test_build_graph(self):
+    def test_build_graph(self, mock_github, mock_llm):
         """Test build_graph returns graph structure."""
-        mock_llm = MagicMock()
-        mock_llm.call_api_structured.return_value = MagicMock(nodes=[], edges=[])
+        mock_llm.call_api_structured.return_value = _EMPTY_GRAPH
 
-        generator = DiagramGenerator(github_client=MagicMock(), llm_client=mock_llm)
+        generator = DiagramGenerator(github_client=mock_github, llm_client=mock_llm)
         generator.state.explanation = "Test explanation"
         generator.state.component_mapping = {"mappings": []}
         result = generator.build_graph()
 
-        assert "nodes" in result
-        assert "edges" in result
+        assert result.keys() >= {"nodes", "edges"}
         assert generator.state.graph_structure == result
 
-    def test_generate_html(self):
+    def test_generate_html(self, mock_github, mock_llm):
         """Test HTML generation with Mermaid."""
-        generator = DiagramGenerator(github_client=MagicMock(), llm_client=MagicMock())
+        generator = DiagramGenerator(github_client=mock_github, llm_client=mock_llm)
         generator.state.graph_structure = {
             "nodes": [{"id": "test", "label": "Test", "group": "service"}],
             "edges": [{"source": "test", "target": "test", "label": "self"}],
@@ -133,41 +194,85 @@ class TestDiagramGenerator:
 
         html = generator.generate_html()
 
-        assert "mermaid" in html
-        assert "flowchart TD" in html
-        assert 'test["Test"]' in html
+        missing = [
+            s for s in ("mermaid", "flowchart TD", 'test["Test"]') if s not in html
+        ]
+        assert not missing, f"missing from HTML: {missing}"
         assert generator.state.graph_html == html
 
-    def test_run_all(self):
-        """Test run_all executes all steps."""
-        mock_github = MagicMock()
-        mock_github.get_repo_data.return_value = {
-            "default_branch": "main",
-            "file_tree": "src/main.py",
-            "readme": "# Test",
-        }
-        mock_github.get_languages.return_value = {"Python": 100}
+    def test_run_all_iter_yields_each_phase(self, mock_github, mock_llm):
+        """Test run_all_iter yields after every step in pipeline order."""
+        mock_github.get_default_branch.return_value = "main"
+        mock_github.get_file_tree.return_value = "src/main.py"
+        mock_github.get_readme.return_value = "# Test"
+        mock_github.get_languages.return_value = {}
         mock_github.get_files_content.return_value = {}
 
-        mock_llm = MagicMock()
-        mock_llm.call_api.return_value = "Generated explanation"
-        mock_llm.call_api_structured.side_effect = [
-            MagicMock(mappings=[]),
-            MagicMock(nodes=[], edges=[]),
-        ]
+        mock_llm.configure_mock(
+            **{
+                "call_api.return_value": "Generated explanation",
+                "call_api_structured.side_effect": [_EMPTY_MAPPING, _EMPTY_GRAPH],
+            }
+        )
 
         generator = DiagramGenerator(github_client=mock_github, llm_client=mock_llm)
-        state = generator.run_all("owner", "repo", "custom instructions")
+        phases = [phase for phase, _ in generator.run_all_iter("owner", "repo")]
+
+        assert phases == [
+            "repo_info",
+            "static_analysis",
+            "explanation",
+            "component_mapping",
+            "graph_structure",
+            "graph_html",
+        ]
+
+
+@pytest.fixture(scope="module")
+def run_all_state():
+    """Run the full pipeline once against mocked clients and share the state."""
+    mock_github = Mock(spec_set=GitHubClient)
+    mock_github.get_default_branch.return_value = "main"
+    mock_github.get_file_tree.return_value = "src/main.py"
+    mock_github.get_readme.return_value = "# Test"
+    mock_github.get_languages.return_value = {"Python": 100}
+    mock_github.get_files_content.return_value = {}
+
+    mock_llm = Mock(spec_set=LLMClient)
+    mock_llm.configure_mock(
+        **{
+            "call_api.return_value": "Generated explanation",
+            "call_api_structured.side_effect": [_EMPTY_MAPPING, _EMPTY_GRAPH],
+        }
+    )
+
+    generator = DiagramGenerator(github_client=mock_github, llm_client=mock_llm)
+    return generator.run_all("owner", "repo", "custom instructions")
+
+
+class TestRunAll:
+    """Tests for the end-to-end run_all pipeline."""
+
+    def test_records_request(self, run_all_state):
+        """Test run_all stores the requested repository and instructions."""
+        assert run_all_state.owner == "owner"
+        assert run_all_state.repo == "repo"
+        assert run_all_state.instructions == "custom instructions"
+
+    def test_fills_analysis_steps(self, run_all_state):
+        """Test run_all populates repository data and static analysis."""
+        assert run_all_state.repo_info != {}
+        assert run_all_state.static_analysis != {}
+
+    def test_fills_llm_steps(self, run_all_state):
+        """Test run_all populates every LLM-generated step."""
+        assert run_all_state.explanation == "Generated explanation"
+        assert run_all_state.component_mapping != {}
+        assert run_all_state.graph_structure != {}
 
-        assert state.owner == "owner"
-        assert state.repo == "repo"
-        assert state.instructions == "custom instructions"
-        assert state.repo_info != {}
-        assert state.static_analysis != {}
-        assert state.explanation == "Generated explanation"
-        assert state.component_mapping != {}
-        assert state.graph_structure != {}
-        assert state.graph_html != ""
+    def test_renders_html(self, run_all_state):
+        """Test run_all finishes by rendering the diagram."""
+        assert run_all_state.graph_html != ""
 
 
 class TestGetDiagramGenerator:
@@ -175,9 +280,6 @@ class TestGetDiagramGenerator:
 
     def test_returns_generator(self):
         """Test factory returns DiagramGenerator instance."""
-        with (
-            patch("gitsplain.diagram.GitHubClient"),
-            patch("gitsplain.diagram.LLMClient"),
-        ):
+        with _patched():
             generator = get_diagram_generator()
             assert isinstance(generator, DiagramGenerator)
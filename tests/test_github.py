@@ -2,125 +2,253 @@
 
 from unittest.mock import MagicMock, patch
 
+import pytest
 from github import GithubException
 
 from gitsplain.services.github import GitHubClient
 
 
-class TestGitHubClient:
-    """Tests for GitHubClient class."""
+@pytest.fixture
+def gh_patch():
+    """Patch the PyGithub entry point for the duration of a test."""
+    with patch("gitsplain.services.github.Github") as mock_github:
+        yield mock_github
 
-    def test_init_with_pat(self):
-        """Test initialization with PAT."""
-        with patch("gitsplain.services.github.Github") as mock_github:
-            client = GitHubClient(pat="test_token")
-            assert client.token == "test_token"
-            mock_github.assert_called_once()
 
-    def test_init_without_pat(self):
-        """Test initialization without PAT uses env var."""
-        with (
-            patch("gitsplain.services.github.Github") as mock_github,
-            patch.dict("os.environ", {"GITHUB_PAT": ""}, clear=False),
-        ):
-            client = GitHubClient()
-            assert client.token is None or client.token == ""
-            mock_github.assert_called_once()
+@pytest.fixture
+def gh_client(gh_patch):
+    """Authenticated client paired with the mocked PyGithub instance it wraps."""
+    mock_client = MagicMock()
+    gh_patch.return_value = mock_client
+    return GitHubClient(pat="test"), mock_client
 
-    def test_should_include_file_valid(self):
-        """Test file inclusion for valid files."""
-        client = GitHubClient.__new__(GitHubClient)
-        client.EXCLUDED_PATTERNS = GitHubClient.EXCLUDED_PATTERNS
 
-        assert client._should_include_file("src/main.py") is True
-        assert client._should_include_file("lib/utils.js") is True
+@pytest.fixture(scope="module")
+def bare_client():
+    """Client built without __init__, for checks that need no PyGithub instance."""
+    return GitHubClient.__new__(GitHubClient)
 
-    def test_should_include_file_excluded(self):
-        """Test file exclusion for excluded patterns."""
-        client = GitHubClient.__new__(GitHubClient)
-        client.EXCLUDED_PATTERNS = GitHubClient.EXCLUDED_PATTERNS
 
-        assert client._should_include_file("node_modules/package/index.js") is False
-        assert client._should_include_file("src/__pycache__/main.pyc") is False
-        assert client._should_include_file("assets/image.png") is False
-        assert client._should_include_file(".venv/lib/python.py") is False
+class TestGitHubClient:
+    """Tests for GitHubClient class."""
 
-    def test_check_repository_exists_true(self):
+    def test_init_with_pat(self, gh_patch):
+        """Test initialization with PAT."""
+        client = GitHubClient(pat="test_token")
+        assert client.token == "test_token"
+        gh_patch.assert_called_once()
+        kwargs = gh_patch.call_args.kwargs
+        assert kwargs["pool_size"] == GitHubClient.MAX_CONCURRENT_REQUESTS
+        assert kwargs["seconds_between_requests"] is None
+
+    def test_init_without_pat(self, gh_patch):
+        """Test initialization without PAT uses env var."""
+        with patch.dict("os.environ", {"GITHUB_PAT": ""}, clear=False):
+            client = GitHubClient()
+        assert client.token is None or client.token == ""
+        gh_patch.assert_called_once()
+
+    @pytest.mark.parametrize(
+        "path,expected",
+        [
+            ("src/main.py", True),
+            ("lib/utils.js", True),
+            ("node_modules/package/index.js", False),
+            ("src/__pycache__/main.pyc", False),
+            ("assets/image.png", False),
+            (".venv/lib/python.py", False),
+        ],
+    )
+    def test_should_include_file(self, bare_client, path, expected):
+        """Test file inclusion against the excluded patterns."""
+        assert bare_client._should_include_file(path) is expected
+
+    def test_check_repository_exists_true(self, gh_client):
         """Test check_repository_exists returns True for existing repo."""
-        with patch("gitsplain.services.github.Github") as mock_github:
-            mock_client = MagicMock()
-            mock_github.return_value = mock_client
-            mock_client.get_repo.return_value = MagicMock()
+        client, mock_client = gh_client
+        mock_client.get_repo.return_value = MagicMock()
 
-            client = GitHubClient(pat="test")
-            assert client.check_repository_exists("owner", "repo") is True
-            mock_client.get_repo.assert_called_with("owner/repo")
+        assert client.check_repository_exists("owner", "repo") is True
+        mock_client.get_repo.assert_called_with("owner/repo")
 
-    def test_check_repository_exists_false(self):
+    def test_check_repository_exists_false(self, gh_client):
         """Test check_repository_exists returns False for missing repo."""
-        with patch("gitsplain.services.github.Github") as mock_github:
-            mock_client = MagicMock()
-            mock_github.return_value = mock_client
-            mock_client.get_repo.side_effect = GithubException(404, "Not Found", None)
+        client, mock_client = gh_client
+        mock_client.get_repo.side_effect = GithubException(404, "Not Found", None)
+
+        assert client.check_repository_exists("owner", "nonexistent") is False
+
+    def test_get_repo_is_cached(self, gh_client):
+        """Test repeated lookups reuse the fetched repository."""
+        client, mock_client = gh_client
+
+        client.get_default_branch("owner", "repo")
+        client.get_languages("owner", "repo")
 
-            client = GitHubClient(pat="test")
-            assert client.check_repository_exists("owner", "nonexistent") is False
+        mock_client.get_repo.assert_called_once_with("owner/repo")
 
-    def test_get_default_branch(self):
+    def test_get_default_branch(self, gh_client):
         """Test get_default_branch returns correct branch."""
-        with patch("gitsplain.services.github.Github") as mock_github:
-            mock_client = MagicMock()
-            mock_github.return_value = mock_client
-            mock_repo = MagicMock()
-            mock_repo.default_branch = "main"
-            mock_client.get_repo.return_value = mock_repo
+        client, mock_client = gh_client
+        mock_repo = MagicMock()
+        mock_repo.default_branch = "main"
+        mock_client.get_repo.return_value = mock_repo
 
-            client = GitHubClient(pat="test")
-            assert client.get_default_branch("owner", "repo") == "main"
+        assert client.get_default_branch("owner", "repo") == "main"
 
-    def test_get_default_branch_error(self):
+    def test_get_default_branch_error(self, gh_client):
         """Test get_default_branch returns None on error."""
-        with patch("gitsplain.services.github.Github") as mock_github:
-            mock_client = MagicMock()
-            mock_github.return_value = mock_client
-            mock_client.get_repo.side_effect = GithubException(404, "Not Found", None)
+        client, mock_client = gh_client
+        mock_client.get_repo.side_effect = GithubException(404, "Not Found", None)
 
-            client = GitHubClient(pat="test")
-            assert client.get_default_branch("owner", "repo") is None
+        assert client.get_default_branch("owner", "repo") is None
 
-    def test_get_languages(self):
+    def test_get_languages(self, gh_client):
         """Test get_languages returns sorted languages."""
-        with patch("gitsplain.services.github.Github") as mock_github:
-            mock_client = MagicMock()
-            mock_github.return_value = mock_client
-            mock_repo = MagicMock()
-            mock_repo.get_languages.return_value = {"Python": 1000, "JavaScript": 500}
-            mock_client.get_repo.return_value = mock_repo
+        client, mock_client = gh_client
+        mock_repo = MagicMock()
+        mock_repo.get_languages.return_value = {"Python": 1000, "JavaScript": 500}
+        mock_client.get_repo.return_value = mock_repo
 
-            client = GitHubClient(pat="test")
-            langs = client.get_languages("owner", "repo")
+        langs = client.get_languages("owner", "repo")
 
-            assert list(langs.keys()) == ["Python", "JavaScript"]
-            assert langs["Python"] == 1000
+        assert list(langs.keys()) == ["Python", "JavaScript"]
+        assert langs["Python"] == 1000
 
-    def test_get_languages_error(self):
+    def test_get_languages_error(self, gh_client):
         """Test get_languages returns empty dict on error."""
-        with patch("gitsplain.services.github.Github") as mock_github:
-            mock_client = MagicMock()
-            mock_github.return_value = mock_client
-            mock_client.get_repo.side_effect = GithubException(404, "Not Found", None)
+        client, mock_client = gh_client
+        mock_client.get_repo.side_effect = GithubException(404, "Not Found", None)
+
+        assert client.get_languages("owner", "repo") == {}
+
+    def test_get_file_tree_filters_raw_tree(self, gh_client):
+        """Test get_file_tree keeps included blobs from the raw tree response."""
+        client, mock_client = gh_client
+        mock_repo = MagicMock()
+        mock_repo.url = "https://api.github.com/repos/owner/repo"
+        mock_repo.default_branch = "main"
+        mock_client.get_repo.return_value = mock_repo
+        mock_client.requester.requestJsonAndCheck.return_value = (
+            {},
+            {
+                "tree": [
+                    {"path": "src", "type": "tree"},
+                    {"path": "src/main.py", "type": "blob"},
+                    {"path": "node_modules/x/index.js", "type": "blob"},
+                ]
+            },
+        )
+
+        assert client.get_file_tree("owner", "repo") == "src/main.py"
+        mock_client.requester.requestJsonAndCheck.assert_called_once_with(
+            "GET",
+            "https://api.github.com/repos/owner/repo/git/trees/main",
+            parameters={"recursive": 1},
+        )
+
+    def test_get_file_tree_at_ref(self, gh_client):
+        """Test get_file_tree reads the tree of the given commit."""
+        client, mock_client = gh_client
+        mock_repo = MagicMock()
+        mock_repo.url = "https://api.github.com/repos/owner/repo"
+        mock_client.get_repo.return_value = mock_repo
+        mock_client.requester.requestJsonAndCheck.return_value = ({}, {"tree": []})
+
+        client.get_file_tree("owner", "repo", ref="abc123")
+
+        url = mock_client.requester.requestJsonAndCheck.call_args.args[1]
+        assert url == "https://api.github.com/repos/owner/repo/git/trees/abc123"
+
+    def test_get_readme_not_found(self, gh_client):
+        """Test get_readme returns empty string when not found."""
+        client, mock_client = gh_client
+        mock_repo = MagicMock()
+        mock_repo.get_readme.side_effect = GithubException(404, "Not Found", None)
+        mock_client.get_repo.return_value = mock_repo
 
-            client = GitHubClient(pat="test")
-            assert client.get_languages("owner", "repo") == {}
+        assert client.get_readme("owner", "repo") == ""
 
-    def test_get_readme_not_found(self):
-        """Test get_readme returns empty string when not found."""
-        with patch("gitsplain.services.github.Github") as mock_github:
-            mock_client = MagicMock()
-            mock_github.return_value = mock_client
-            mock_repo = MagicMock()
-            mock_repo.get_readme.side_effect = GithubException(404, "Not Found", None)
-            mock_client.get_repo.return_value = mock_repo
-
-            client = GitHubClient(pat="test")
-            assert client.get_readme("owner", "repo") == ""
+    def test_get_files_content_preserves_order_and_skips_missing(self, gh_patch):
+        """Test get_files_content keeps request order and drops failed files."""
+        with patch.dict("os.environ", {"GITHUB_PAT": ""}, clear=False):
+            client = GitHubClient()
+        contents = {"a.py": "a", "b.py": None, "c.py": "c"}
+        with patch.object(
+            client,
+            "_read_file",
+            side_effect=lambda repository, ref, path: contents[path],
+        ):
+            result = client.get_files_content("owner", "repo", list(contents))
+
+        assert result == {"a.py": "a", "c.py": "c"}
+        assert list(result) == ["a.py", "c.py"]
+
+    def test_get_head_sha(self, gh_client):
+        """Test get_head_sha returns the default branch head commit."""
+        client, mock_client = gh_client
+        mock_repo = MagicMock()
+        mock_repo.default_branch = "main"
+        mock_repo.get_branch.return_value.commit.sha = "abc123"
+        mock_client.get_repo.return_value = mock_repo
+
+        assert client.get_head_sha("owner", "repo") == "abc123"
+        mock_repo.get_branch.assert_called_with("main")
+
+    def test_get_head_sha_error(self, gh_client):
+        """Test get_head_sha returns None on error."""
+        client, mock_client = gh_client
+        mock_client.get_repo.side_effect = GithubException(404, "Not Found", None)
+
+        assert client.get_head_sha("owner", "repo") is None
+
+    def test_get_files_content_graphql_batch(self, gh_client):
+        """Test authenticated clients fetch files in one GraphQL query."""
+        client, mock_client = gh_client
+        mock_client.requester.graphql_query.return_value = (
+            {},
+            {
+                "data": {
+                    "repository": {
+                        "f0": {"text": "a", "isTruncated": False},
+                        "f1": None,
+                        "f2": {"text": None, "isTruncated": False},
+                    }
+                }
+            },
+        )
+
+        result = client.get_files_content(
+            "owner", "repo", ["a.py", "missing.py", "image.bin"]
+        )
+
+        assert result == {"a.py": "a"}
+        mock_client.requester.graphql_query.assert_called_once()
+        variables = mock_client.requester.graphql_query.call_args.args[1]
+        assert variables["e0"] == "HEAD:a.py"
+
+    def test_get_files_content_graphql_at_ref(self, gh_client):
+        """Test GraphQL blob expressions use the given ref instead of HEAD."""
+        client, mock_client = gh_client
+        mock_client.requester.graphql_query.return_value = (
+            {},
+            {"data": {"repository": {"f0": {"text": "a", "isTruncated": False}}}},
+        )
+
+        client.get_files_content("owner", "repo", ["a.py"], ref="abc123")
+
+        variables = mock_client.requester.graphql_query.call_args.args[1]
+        assert variables["e0"] == "abc123:a.py"
+
+    def test_get_files_content_graphql_falls_back_to_rest(self, gh_client):
+        """Test GraphQL errors fall back to per-file REST requests."""
+        client, mock_client = gh_client
+        mock_client.requester.graphql_query.side_effect = GithubException(
+            401, "Unauthorized", None
+        )
+
+        with patch.object(client, "_read_file", return_value="a"):
+            result = client.get_files_content("owner", "repo", ["a.py"])
+
+        assert result == {"a.py": "a"}
+        mock_client.get_repo.assert_called_once_with("owner/repo")
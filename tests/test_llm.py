@@ -0,0 +1,101 @@
+"""Tests for LLM client."""
+
+from unittest.mock import MagicMock, patch
+
+import pytest
+from pydantic import BaseModel
+
+from gitsplain.services.llm import LLMClient, _structured_llm
+
+
+class Answer(BaseModel):
+    value: str
+
+
+class TestLLMClient:
+    """Tests for LLMClient class."""
+
+    def test_call_api_returns_content(self):
+        """Test call_api returns the response text."""
+        client = LLMClient(api_key="test")
+        with patch.object(client, "_build_prompt") as mock_prompt:
+            chain = mock_prompt.return_value.__or__.return_value
+            chain.invoke.return_value = MagicMock(content="4")
+
+            result = client.call_api("You are helpful.", {"question": "2 + 2?"})
+
+        assert result == "4"
+        chain.invoke.assert_called_once_with({"question": "2 + 2?"})
+
+    def test_call_api_empty_content_raises(self):
+        """Test an empty response is reported as an error."""
+        client = LLMClient(api_key="test")
+        with patch.object(client, "_build_prompt") as mock_prompt:
+            chain = mock_prompt.return_value.__or__.return_value
+            chain.invoke.return_value = MagicMock(content="")
+
+            with pytest.raises(ValueError):
+                client.call_api("You are helpful.", {"question": "2 + 2?"})
+
+    def test_call_api_structured_returns_response(self):
+        """Test structured calls return the parsed response model."""
+        client = LLMClient(api_key="test")
+        with patch.object(client, "_build_prompt") as mock_prompt:
+            chain = mock_prompt.return_value.__or__.return_value
+            chain.invoke.return_value = Answer(value="4")
+
+            result = client.call_api_structured("Answer.", {"q": "2 + 2?"}, Answer)
+
+        assert result == Answer(value="4")
+
+    def test_structured_runnable_shared_across_clients(self):
+        """Test the structured-output runnable is built once per response model."""
+        first = LLMClient(api_key="test")
+        second = LLMClient(api_key="test")
+
+        assert first._client is second._client
+        assert _structured_llm(
+            first.model_name, first._api_key, Answer
+        ) is _structured_llm(second.model_name, second._api_key, Answer)
+
+    def test_call_api_structured_streams_partials(self):
+        """Test streamed structured calls report partial objects."""
+        client = LLMClient(api_key="test")
+        partials = []
+        with patch.object(client, "_build_prompt") as mock_prompt:
+            chain = mock_prompt.return_value.__or__.return_value
+            chain.stream.return_value = [
+                MagicMock(content='{"value": '),
+                MagicMock(content='"4"}'),
+            ]
+
+            result = client.call_api_structured(
+                "Answer.", {"q": "2 + 2?"}, Answer, on_partial=partials.append
+            )
+
+        assert result == Answer(value="4")
+        assert partials == [{"value": "4"}]
+
+    def test_call_api_stream_yields_text(self):
+        """Test streamed chunks pass through text and skip empty chunks."""
+        client = LLMClient(api_key="test")
+        with patch.object(client, "_build_prompt") as mock_prompt:
+            chain = mock_prompt.return_value.__or__.return_value
+            chain.stream.return_value = [
+                MagicMock(content="Hello"),
+                MagicMock(content=""),
+                MagicMock(content=[{"type": "text", "text": " world"}]),
+            ]
+
+            chunks = list(client.call_api_stream("You are helpful.", {"q": "hi"}))
+
+        assert chunks == ["Hello", " world"]
+
+    def test_build_prompt_reuses_template(self):
+        """Test templates are built once per system prompt and input keys."""
+        client = LLMClient(api_key="test")
+        first = client._build_prompt("Use {json}.", {"question": "a"})
+        second = client._build_prompt("Use {json}.", {"question": "b"})
+
+        assert first is second
+        assert first.input_variables == ["question"]